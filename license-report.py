@@ -1,11 +1,16 @@
 import pytz
+import xlsxwriter
 import pandas as pd
+import pyarrow as pa
 from dotenv import load_dotenv
 from email.message import EmailMessage
 from datetime import datetime, timedelta
-from openpyxl.utils import get_column_letter
 from msal import ConfidentialClientApplication
-import os, io, csv, pathlib, requests, smtplib
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+import os, io, re, pathlib, orjson, requests, smtplib
 
 # Configurations
 GRAPH = "https://graph.microsoft.com"
@@ -15,6 +20,18 @@ STALE_DAYS = 45
 OUTFILE = pathlib.Path("m365_license_health.xlsx")
 est = pytz.timezone("US/Eastern")
 
+# Activity report columns, in fallback order
+REPORT_UPN_COLUMNS = ["User Principal Name", "UPN", "User Id"]
+REPORT_DATE_COLUMNS = ["Last Activity Date", "Last Activity Date (UTC)", "Report Refresh Date"]
+
+# Shared HTTP session (connection pooling, retries on throttling, honors Retry-After)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 503], respect_retry_after_header=True)
+))
+
 UNIT_COST_DICTIONARY = {
     "ATP_ENTERPRISE": 3.00,
     "Clipchamp_Standard": 7.00,
@@ -43,6 +60,10 @@ UNIT_COST_DICTIONARY = {
     "Teams_Premium_(for_Departments)": 7.00,
 }
 
+# Unit cost lookup and paid SKUs (non-zero unit cost), computed once
+UNIT_COST_SERIES = pd.Series(UNIT_COST_DICTIONARY, dtype="float64")
+PAID_SKUS = frozenset(UNIT_COST_SERIES.index[UNIT_COST_SERIES > 0])
+
 
 def get_graph_api_access_token():
     """
@@ -73,13 +94,18 @@ def graph_api_get_request(url, token, stream=False):
 
     The Graph API URL is taken from the `url` argument.
 
+    Advanced queries (`$count=true`, including their nextLinks) are sent
+    with the `ConsistencyLevel: eventual` header that Graph requires.
+
     The response is returned as a `requests.Response` object.
     """
     headers = {
         "Authorization": f"Bearer {token}",
         "Accept": "text/csv" if "/reports/" in url else "application/json"
     }
-    return requests.get(url, headers=headers, stream=stream)
+    if "$count=true" in unquote(url):
+        headers["ConsistencyLevel"] = "eventual"
+    return SESSION.get(url, headers=headers, stream=stream)
 
 
 def pagination_helper(url, token):
@@ -97,7 +123,7 @@ def pagination_helper(url, token):
     The function will return immediately if the `url` argument is `None`.
     """
     while url:
-        data = graph_api_get_request(url, token).json()
+        data = orjson.loads(graph_api_get_request(url, token).content)
         for item in data.get("value", []):
             yield item
         url = data.get("@odata.nextLink")
@@ -110,8 +136,8 @@ def parse_date_any(date):
 
     The string is first stripped of any whitespace and then any zero-width
     spaces, non-breaking spaces, or "byte order mark" characters are replaced
-    with regular spaces. The string is then parsed using pandas to_datetime
-    with errors="coerce", which means that if the string cannot be parsed, the
+    with regular spaces. The string is then parsed as ISO 8601 using pandas
+    to_datetime with errors="coerce", which means that if the string cannot be parsed, the
     function will return NaT. The timezone is set to UTC.
 
     Parameters
@@ -134,9 +160,7 @@ def parse_date_any(date):
     if not date_string or date_string.lower() == "nan":
         return pd.NaT
     
-    date_string = date_string.replace("Z","").replace(".000","")
-    
-    return pd.to_datetime(date_string, errors="coerce", utc=True)
+    return pd.to_datetime(date_string, format="ISO8601", errors="coerce", utc=True)
 
 
 def get_licenses(token):
@@ -171,7 +195,7 @@ def get_licenses(token):
     
     url = f"{API}/subscribedSkus?$select=skuId,skuPartNumber,prepaidUnits,consumedUnits"
     
-    response = graph_api_get_request(url, token).json()
+    response = orjson.loads(graph_api_get_request(url, token).content)
     
     rows = []
     
@@ -180,26 +204,30 @@ def get_licenses(token):
         enabled = prepaid.get("enabled", 0)
         consumed = sku.get("consumedUnits", 0)
         remaining = max(enabled - consumed, 0)
-        part = sku["skuPartNumber"]
-        est_cost = round(consumed * UNIT_COST_DICTIONARY.get(part, 0), 2)
         
         rows.append({
             "skuId": sku["skuId"],
-            "skuPartNumber": part,
+            "skuPartNumber": sku["skuPartNumber"],
             "total_enabled": enabled,
             "consumed": consumed,
             "remaining": remaining,
             "warning": prepaid.get("warning", 0),
-            "suspended": prepaid.get("suspended", 0),
-            "estMonthlyCost": est_cost
+            "suspended": prepaid.get("suspended", 0)
         })
+
+    skus_df = pd.DataFrame(rows, columns=[
+        "skuId", "skuPartNumber", "total_enabled", "consumed", "remaining", "warning", "suspended"
+    ])
+
+    unit_cost = skus_df["skuPartNumber"].map(UNIT_COST_SERIES).fillna(0.0)
+    skus_df["estMonthlyCost"] = (skus_df["consumed"].astype("float64") * unit_cost).round(2)
         
-    return pd.DataFrame(rows)
+    return skus_df
 
 
 def get_all_users(token):  
     """
-    Get all users with their details
+    Get all licensed or disabled users with their details
 
     The function takes an access token for the Graph API as a parameter.
 
@@ -212,8 +240,7 @@ def get_all_users(token):
     - accountEnabled
     - userType
     - createdDateTime
-    - assignedLicenses (a list of skuIds)
-    - assignedPlans (a list of plans)
+    - assignedLicenses (a list of skuIds, as an Arrow list<string> column)
 
     The function will return an empty DataFrame if the request fails.
 
@@ -231,14 +258,24 @@ def get_all_users(token):
     fields = ",".join([
         "id", "displayName", "userPrincipalName", "mail", 
         "accountEnabled", "userType", "createdDateTime", 
-        "assignedLicenses", "assignedPlans"
+        "assignedLicenses"
     ])
     
-    url = f"{API}/users?$select={fields}&$top=999"
+    # Only licensed or disabled accounts are relevant to the report (advanced query)
+    user_filter = "assignedLicenses/$count ne 0 or accountEnabled eq false"
+    
+    url = f"{API}/users?$count=true&$filter={user_filter}&$select={fields}&$top=999"
     
     users = []
+
+    # assignedLicenses as one flat skuId list plus per-user offsets (Arrow list layout)
+    lic_flat = []
+    lic_offsets = [0]
     
     for user in pagination_helper(url, token):
+        lic_flat.extend(lic.get("skuId") for lic in user.get("assignedLicenses", []))
+        lic_offsets.append(len(lic_flat))
+
         users.append({
             "id": user["id"],
             "displayName": user.get("displayName", ""),
@@ -246,12 +283,17 @@ def get_all_users(token):
             "mail": user.get("mail", ""),
             "accountEnabled": user.get("accountEnabled", True),
             "userType": user.get("userType", "Member"),
-            "createdDateTime": user.get("createdDateTime", ""),
-            "assignedLicenses": [lic.get("skuId") for lic in user.get("assignedLicenses", [])],
-            "assignedPlans": user.get("assignedPlans", [])
+            "createdDateTime": user.get("createdDateTime", "")
         })
         
-    return pd.DataFrame(users)
+    users_df = pd.DataFrame(users)
+    users_df["userType"] = users_df["userType"].astype("category")
+    users_df["assignedLicenses"] = pd.arrays.ArrowExtensionArray(pa.ListArray.from_arrays(
+        pa.array(lic_offsets, type=pa.int32()),
+        pa.array(lic_flat, type=pa.string())
+    ))
+
+    return users_df
 
 
 def get_users_activity_status(token):
@@ -279,25 +321,70 @@ def get_users_activity_status(token):
     
     url = f"{API}/reports/getOffice365ActiveUserDetail(period='D{PERIOD_DAYS}')"
     
-    response = graph_api_get_request(url, token, stream=True).content.decode("utf-8-sig", errors="ignore")
-    
-    reader = csv.DictReader(io.StringIO(response))
-    
-    user_activity = []
-    
-    for row in reader:
-        upn = (
-            row.get("User Principal Name") or 
-            row.get("UPN") or 
-            row.get("User Id") or ""
-        ).strip().lower()
-        
-        if not upn or upn.startswith(("user ", "hidden", "redacted")):
-            continue
-        activity = row.get("Last Activity Date") or row.get("Last Activity Date (UTC)") or row.get("Report Refresh Date")
-        user_activity.append({"UPN_lower": upn, "LastActivityDate": activity})
-    
-    return pd.DataFrame(user_activity)
+    content = graph_api_get_request(url, token).content
+
+    report_columns = REPORT_UPN_COLUMNS + REPORT_DATE_COLUMNS
+
+    report_df = pd.read_csv(
+        io.BytesIO(content),
+        encoding="utf-8-sig",
+        encoding_errors="ignore",
+        dtype=str,
+        usecols=lambda c: c in report_columns
+    ).reindex(columns=report_columns)
+
+    # First non-empty value per row, in fallback order
+    def first_non_empty(columns):
+        values = report_df[columns[0]]
+        for column in columns[1:]:
+            values = values.fillna(report_df[column])
+        return values
+
+    upn = first_non_empty(REPORT_UPN_COLUMNS).fillna("").str.strip().str.lower()
+    activity = first_non_empty(REPORT_DATE_COLUMNS)
+
+    keep = (upn != "") & ~upn.str.startswith(("user ", "hidden", "redacted"))
+
+    return pd.DataFrame({
+        "UPN_lower": upn[keep],
+        "LastActivityDate": activity[keep]
+    }).reset_index(drop=True)
+
+
+def write_sheet(workbook, sheet_name, df, header_format=None):
+    """
+    Write a pandas DataFrame to a new worksheet, one row at a time.
+
+    Rows are written in order with `write_row`, which keeps the workbook
+    usable in xlsxwriter's constant_memory mode. Missing values are written
+    as blank cells.
+
+    Parameters
+    ----------
+    workbook : xlsxwriter.Workbook
+        The workbook to add the worksheet to.
+    sheet_name : str
+        The name of the new worksheet.
+    df : pd.DataFrame
+        The DataFrame to write, with its columns as the header row.
+    header_format : xlsxwriter.format.Format, optional
+        The cell format for the header row.
+
+    Returns
+    -------
+    xlsxwriter.worksheet.Worksheet
+        The new worksheet.
+    """
+
+    ws = workbook.add_worksheet(sheet_name)
+    ws.write_row(0, 0, df.columns, header_format)
+
+    cells = df.astype(object).where(df.notna(), None)
+
+    for i, row in enumerate(cells.itertuples(index=False, name=None), start=1):
+        ws.write_row(i, 0, row)
+
+    return ws
 
 
 def df_to_email_html(df):
@@ -332,13 +419,14 @@ def df_to_email_html(df):
     # build rows manually for clean control
     headers = "".join(f"<th style='{th}'>{h}</th>" for h in df.columns)
     
-    body_rows = []
-    
-    for _, row in df.iterrows():
-        tds = "".join(f"<td style='{td}'>{'' if pd.isna(v) else v}</td>" for v in row)
-        body_rows.append(f"<tr>{tds}</tr>")
-    
-    body = "\n".join(body_rows)
+    td_open = f"<td style='{td}'>"
+    td_close = "</td>"
+
+    cells = df.astype(object).where(df.notna(), "").to_numpy(dtype=object)
+
+    body = "\n".join(
+        "<tr>" + "".join(td_open + str(v) + td_close for v in row) + "</tr>" for row in cells
+    )
     
     return f"<table style='{style}'><thead><tr>{headers}</tr></thead><tbody>{body}</tbody></table>"
 
@@ -381,13 +469,13 @@ def send_email(attachment_path, overview_html):
         </body></html>
     """, subtype="html")
 
-    with open(attachment_path, "rb") as f:
-        msg.add_attachment(
-            f.read(),
-            maintype="application",
-            subtype="vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename=pathlib.Path(attachment_path).name
-        )
+    attachment = pathlib.Path(attachment_path)
+    msg.add_attachment(
+        attachment.read_bytes(),
+        maintype="application",
+        subtype="vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=attachment.name
+    )
 
     smtp = smtplib.SMTP("smtp.office365.com", 587)
     smtp.starttls()
@@ -423,46 +511,53 @@ def process_and_export_data(skus_df, users_df, activity_df, outfile_path):
         """
 
     # Data cleaning and preparation
-    activity_df["LastActivityDate"] = pd.to_datetime(activity_df["LastActivityDate"], errors="coerce", utc=True)
+    activity_df["LastActivityDate"] = pd.to_datetime(activity_df["LastActivityDate"], format="ISO8601", errors="coerce", utc=True)
     users_df["UPN_lower"] = users_df["UPN"].fillna("").astype(str).str.strip().str.lower()
     activity_df["UPN_lower"] = activity_df["UPN_lower"].fillna("").astype(str).str.strip().str.lower()
+
+    # Arrow-backed join keys hash faster than object strings
+    users_df["UPN_lower"] = users_df["UPN_lower"].astype("string[pyarrow]")
+    activity_df["UPN_lower"] = activity_df["UPN_lower"].astype("string[pyarrow]")
     merged_df = users_df.merge(activity_df, how="left", on="UPN_lower")
 
-    # Timezone adjustments
-    merged_df["LastActivityDate"] = merged_df["LastActivityDate"].dt.tz_convert("US/Eastern").dt.tz_localize(None).dt.date
-    merged_df["createdDateTime"] = pd.to_datetime(merged_df["createdDateTime"], errors="coerce", utc=True)
-    merged_df["createdDateTime"] = merged_df["createdDateTime"].dt.tz_convert("US/Eastern").dt.tz_localize(None).dt.date
+    # Timezone adjustments (Eastern wall time, kept as datetime64; Excel does not accept tz-aware values)
+    merged_df["LastActivityDate"] = merged_df["LastActivityDate"].dt.tz_convert("US/Eastern").dt.tz_localize(None)
+    merged_df["createdDateTime"] = pd.to_datetime(merged_df["createdDateTime"], format="%Y-%m-%dT%H:%M:%SZ", errors="coerce", utc=True)
+    merged_df["createdDateTime"] = merged_df["createdDateTime"].dt.tz_convert("US/Eastern").dt.tz_localize(None)
 
-    # Inactive flag
-    inactivity_cutoff = (datetime.now(est) - timedelta(days=PERIOD_DAYS)).date()
-    merged_df["Inactive30d"] = merged_df["LastActivityDate"].apply(lambda ts: True if pd.isna(ts) else ts <= inactivity_cutoff)
+    # Inactive flag (compared by calendar day)
+    inactivity_cutoff = pd.Timestamp(datetime.now(est) - timedelta(days=PERIOD_DAYS)).tz_localize(None).normalize()
+    merged_df["Inactive30d"] = merged_df["LastActivityDate"].isna() | (merged_df["LastActivityDate"].dt.normalize() <= inactivity_cutoff)
 
 
     # Build license string from assignedLicenses
     license_map = dict(zip(skus_df["skuId"], skus_df["skuPartNumber"]))
-    merged_df["licenses"] = merged_df["assignedLicenses"].apply(
-        lambda arr: ";".join(sorted({license_map.get(x, str(x)) for x in (arr or [])}))
+
+    # Dictionary-code skuIds once, resolve names per distinct skuId (sorted factorize: code order = name order)
+    lic_ids = merged_df["assignedLicenses"].explode().dropna().astype("category")
+    name_codes, names = pd.factorize(
+        pd.Index([license_map.get(sku_id, str(sku_id)) for sku_id in lic_ids.cat.categories], dtype=object), sort=True
     )
+    lic_rows = pd.DataFrame({"row": lic_ids.index, "code": name_codes[lic_ids.cat.codes]})
+    lic_rows = lic_rows.drop_duplicates().sort_values("code")
+    lic_rows["name"] = names.take(lic_rows["code"])
+    merged_df["licenses"] = lic_rows.groupby("row")["name"].agg(";".join).reindex(merged_df.index, fill_value="")
     merged_df["hasLicense"] = merged_df["licenses"].str.len() > 0
 
     # Paid license checks
-    paid_skus = {k for k, v in UNIT_COST_DICTIONARY.items() if (v or 0) > 0}
     exclude_for_disabled = {"EXCHANGEENTERPRISE"}
-    paid_excl = paid_skus.difference(exclude_for_disabled)
+    paid_excl = PAID_SKUS.difference(exclude_for_disabled)
 
-    def has_paid(lics): return any(sku in paid_skus for sku in lics.split(";") if sku)
-    def has_paid_excl(lics): return any(sku in paid_excl for sku in lics.split(";") if sku)
+    # Match whole SKU names between ";" separators
+    def sku_pattern(skus): return re.compile("(?:^|;)(?:" + "|".join(re.escape(sku) for sku in sorted(skus)) + ")(?=;|$)")
 
     # Add paid license flags
-    merged_df["hasPaidLicense"] = merged_df["licenses"].apply(has_paid)
-    merged_df["hasPaidLicenseExclExchEnt"] = merged_df["licenses"].apply(has_paid_excl)
+    merged_df["hasPaidLicense"] = merged_df["licenses"].str.contains(sku_pattern(PAID_SKUS), na=False)
+    merged_df["hasPaidLicenseExclExchEnt"] = merged_df["licenses"].str.contains(sku_pattern(paid_excl), na=False)
 
     # Actionables
-    actionable = pd.DataFrame()
-
     to_do1 = merged_df[(merged_df["hasLicense"]) & (merged_df["Inactive30d"]) & (merged_df["hasPaidLicense"])].copy()
     to_do1["Reason"] = "Licensed but no activity in last 30d"
-    actionable = pd.concat([actionable, to_do1], ignore_index=True)
 
     to_do2 = merged_df[
         (merged_df["hasLicense"]) &
@@ -470,21 +565,20 @@ def process_and_export_data(skus_df, users_df, activity_df, outfile_path):
         (merged_df["accountEnabled"] == False)
     ].copy()
     to_do2["Reason"] = "Disabled account has licenses"
-    actionable = pd.concat([actionable, to_do2], ignore_index=True)
+
+    actionable = pd.concat([to_do1, to_do2], ignore_index=True)
 
     # SKU usage stats
-    sku_stats = []
-    for _, row in merged_df.iterrows():
-        if not row["hasLicense"]:
-            continue
-        active = not row["Inactive30d"]
-        for sku in filter(None, row["licenses"].split(";")):
-            sku_stats.append((sku, 1, 1 if active else 0))
-    if sku_stats:
-        sku_frame = pd.DataFrame(sku_stats, columns=["skuPartNumber", "licensedUsers", "activeUsers30d"])
-        util = sku_frame.groupby("skuPartNumber", as_index=False).sum()
-    else:
-        util = pd.DataFrame(columns=["skuPartNumber", "licensedUsers", "activeUsers30d"])
+    lic = merged_df.loc[merged_df["hasLicense"], ["licenses", "Inactive30d"]].copy()
+    lic["sku"] = lic["licenses"].str.split(";")
+    lic = lic.explode("sku")
+    lic = lic[lic["sku"].astype(bool)]
+    lic["sku"] = lic["sku"].astype("category")
+    lic["active"] = (~lic["Inactive30d"]).astype("int64")
+    util = lic.groupby("sku", as_index=False, observed=True).agg(
+        licensedUsers=("sku", "size"),
+        activeUsers30d=("active", "sum")
+    ).rename(columns={"sku": "skuPartNumber"})
     util["utilizationPct30d"] = (util["activeUsers30d"] / util["licensedUsers"]).round(4) * 100.0
 
     # Merge utilization into SKU summary
@@ -495,7 +589,7 @@ def process_and_export_data(skus_df, users_df, activity_df, outfile_path):
     ].fillna(0)
 
     # Paid SKUs
-    sku_summary["unitCost"] = sku_summary["skuPartNumber"].map(UNIT_COST_DICTIONARY).fillna(0.0)
+    sku_summary["unitCost"] = sku_summary["skuPartNumber"].map(UNIT_COST_SERIES).fillna(0.0)
     has_enabled = sku_summary["total_enabled"] > 0
     ends_bulk = sku_summary["total_enabled"].astype(str).str.endswith(("00", "000"))
     is_paid = sku_summary["unitCost"] > 0
@@ -544,58 +638,40 @@ def process_and_export_data(skus_df, users_df, activity_df, outfile_path):
         "estMonthlyCost": "Est. Monthly Cost ($)"
     }
 
-    # Write Excel file
-    with pd.ExcelWriter(outfile_path, engine="openpyxl") as xw:
-        kpis.to_excel(xw, sheet_name="Overview", index=False)
-        
-        cost_summary[sku_cols].sort_values("skuPartNumber").rename(
-            columns=CUSTOM_SKU_HEADERS
-        ).to_excel(xw, sheet_name="SKU_Summary", index=False)
-        
-        actionable[actionable_cols].drop_duplicates(
-            subset=["Reason", "UPN"]
-        ).sort_values(["Reason", "UPN"]).to_excel(xw, sheet_name="Actionable", index=False)
-        
-        merged_df[users_out_cols].sort_values("UPN").to_excel(xw, sheet_name="Users", index=False)
-        
+    # Deduplicate actionables on integer-coded Reason and Arrow-backed UPN
+    actionable_out = actionable[actionable_cols].astype({"Reason": "category", "UPN": "string[pyarrow]"})
+    actionable_out = actionable_out.drop_duplicates(subset=["Reason", "UPN"]).sort_values(["Reason", "UPN"])
 
-    # Write Excel file 
-    with pd.ExcelWriter(outfile_path, engine="openpyxl") as xw:
+    # Write Excel file (rows are flushed as they are written)
+    with xlsxwriter.Workbook(outfile_path, {
+        "constant_memory": True,
+        "default_date_format": "mm-dd-yyyy",
+        "strings_to_urls": False
+    }) as wb:
+        header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
 
-        cost_summary[sku_cols].sort_values("skuPartNumber").rename(
+        write_sheet(wb, "Overview", kpis, header_format)
+        
+        ws = write_sheet(wb, "SKU_Summary", cost_summary[sku_cols].sort_values("skuPartNumber").rename(
             columns=CUSTOM_SKU_HEADERS
-        ).to_excel(xw, sheet_name="SKU_Summary", index=False)
-
-        actionable[actionable_cols].drop_duplicates(
-            subset=["Reason", "UPN"]
-        ).sort_values(["Reason", "UPN"]).to_excel(xw, sheet_name="Actionable", index=False)
-
-        merged_df[users_out_cols].sort_values("UPN").to_excel(xw, sheet_name="Users", index=False)
-         
-        # Column width adjustments
-        wb = xw.book
+        ), header_format)
+        ws.set_column(0, 0, 40)
+        
+        ws = write_sheet(wb, "Actionable", actionable_out, header_format)
+        ws.set_column(0, 0, 30)
+        ws.set_column(1, 1, 25)
+        ws.set_column(5, 5, 15)
+        ws.set_column(6, 6, 30)
+        ws.set_column(7, 7, 15)
         
-        for sheet in ["SKU_Summary"]:
-            ws = wb[sheet]
-            ws.column_dimensions[get_column_letter(1)].width = 40   
-            
-        for sheet in ["Users"]:
-            ws = wb[sheet]
-            ws.column_dimensions[get_column_letter(1)].width = 30   
-            ws.column_dimensions[get_column_letter(2)].width = 25   
-            ws.column_dimensions[get_column_letter(5)].width = 15   
-            ws.column_dimensions[get_column_letter(7)].width = 15   
-            ws.column_dimensions[get_column_letter(6)].width = 30
-            
-        for sheet in ["Actionable"]:
-            ws = wb[sheet]
-            ws.column_dimensions[get_column_letter(1)].width = 30
-            ws.column_dimensions[get_column_letter(2)].width = 25   
-            ws.column_dimensions[get_column_letter(6)].width = 15     
-            ws.column_dimensions[get_column_letter(7)].width = 30   
-            ws.column_dimensions[get_column_letter(8)].width = 15   
-            
-        overview_html = df_to_email_html(kpis)
+        ws = write_sheet(wb, "Users", merged_df[users_out_cols].sort_values("UPN"), header_format)
+        ws.set_column(0, 0, 30)
+        ws.set_column(1, 1, 25)
+        ws.set_column(4, 4, 15)
+        ws.set_column(5, 5, 30)
+        ws.set_column(6, 6, 15)
+
+    overview_html = df_to_email_html(kpis)
         
     return overview_html
 
@@ -604,9 +680,15 @@ def main():
     OUTFILE.parent.mkdir(parents=True, exist_ok=True)
     token = get_graph_api_access_token()
 
-    skus = get_licenses(token)
-    users = get_all_users(token)
-    activity = get_users_activity_status(token)
+    # Independent Graph queries, fetched concurrently over the shared session
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        skus_future = pool.submit(get_licenses, token)
+        users_future = pool.submit(get_all_users, token)
+        activity_future = pool.submit(get_users_activity_status, token)
+
+    skus = skus_future.result()
+    users = users_future.result()
+    activity = activity_future.result()
 
     overview_html = process_and_export_data(skus, users, activity, OUTFILE)
 
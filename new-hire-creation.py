@@ -1,6 +1,8 @@
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import orjson
 import msal
 import os
 from dotenv import load_dotenv
@@ -14,6 +16,8 @@ CLIENT_SECRET = os.getenv("AZURE_CLIENT_SECRET")
 AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
 SCOPE = ["https://graph.microsoft.com/.default"]
 GRAPH_API = "https://graph.microsoft.com/v1.0"
+BATCH_LIMIT = 20
+MAX_ATTEMPTS = 5
 
 # Replace with group IDs
 GROUP_IDS = [
@@ -31,51 +35,126 @@ def get_token():
         raise Exception("Could not get token")
     return result["access_token"]
 
-def create_user(token, user_data):
-    headers = {
+def make_session(token):
+    # Auth headers and pooled keep-alive connections shared by every Graph call
+    session = requests.Session()
+    session.headers.update({
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
-    }
-
-    response = requests.post(f"{GRAPH_API}/users", headers=headers, json=user_data)
-    response.raise_for_status()
-    return response.json()["id"]
-
-def assign_manager(token, user_id, manager_email):
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
-    # Look up manager's Object ID from email
-    lookup_url = f"{GRAPH_API}/users/{manager_email}"
-    lookup_resp = requests.get(lookup_url, headers=headers)
-    lookup_resp.raise_for_status()
-    manager_id = lookup_resp.json()["id"]
-
+    })
+    session.mount("https://", HTTPAdapter(pool_maxsize=16))
+    return session
+
+def retry_delay(result, attempt):
+    # Honor Retry-After (seconds) when Graph sends it, otherwise back off exponentially
+    retry_after = str((result.get("headers") or {}).get("Retry-After", ""))
+    return int(retry_after) if retry_after.isdigit() else 2 ** attempt
+
+def retry_request(request, retry_ids):
+    # dependsOn may only name requests in the same batch, so drop dependencies that already succeeded
+    depends_on = [dep for dep in request.get("dependsOn", []) if dep in retry_ids]
+    request = {key: value for key, value in request.items() if key != "dependsOn"}
+    if depends_on:
+        request["dependsOn"] = depends_on
+    return request
+
+def graph_batch(session, batch_requests, not_found_id=None):
+    # Sub-requests that were throttled (429/503), or that got 404 for `not_found_id`
+    # (a just-created object that has not replicated yet), are retried on their own.
+    # POSTs are not idempotent, so they are only retried on 429 (never processed).
+    # Responses are returned by request id; the caller decides what a failure means.
+    results = {}
+    pending = list(batch_requests)
+    methods = {request["id"]: request["method"] for request in batch_requests}
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        retry_ids = set()
+        delay = 0
+
+        # Graph accepts at most 20 requests per batch
+        for start in range(0, len(pending), BATCH_LIMIT):
+            response = session.post(
+                f"{GRAPH_API}/$batch",
+                json={"requests": pending[start:start + BATCH_LIMIT]}
+            )
+            response.raise_for_status()
+            for result in orjson.loads(response.content)["responses"]:
+                results[result["id"]] = result
+                status = result["status"]
+                not_found = status == 404 and not_found_id and not_found_id in str(result.get("body"))
+                throttled = status == 429 or (status == 503 and methods[result["id"]] != "POST")
+                if throttled or not_found:
+                    retry_ids.add(result["id"])
+                    delay = max(delay, retry_delay(result, attempt))
+
+        # Requests skipped only because a retried dependency failed are retried with it
+        for request in pending:
+            if results[request["id"]]["status"] == 424 and set(request.get("dependsOn", [])) <= retry_ids:
+                retry_ids.add(request["id"])
+
+        if not retry_ids or attempt == MAX_ATTEMPTS:
+            break
+
+        pending = [retry_request(request, retry_ids) for request in pending if request["id"] in retry_ids]
+        time.sleep(delay)
+
+    return results
+
+def failed(result):
+    return f"{result['status']}: {result.get('body')}"
+
+def create_user(session, user_data, manager_email):
+    # Look up the manager's Object ID and create the user in one round-trip.
+    # The user is only created once the lookup succeeds (otherwise Graph answers 424 Failed Dependency).
+    results = graph_batch(session, [
+        {
+            "id": "manager",
+            "method": "GET",
+            "url": f"/users/{manager_email}?$select=id"
+        },
+        {
+            "id": "user",
+            "method": "POST",
+            "url": "/users",
+            "body": user_data,
+            "headers": {"Content-Type": "application/json"},
+            "dependsOn": ["manager"]
+        }
+    ])
+    if results["manager"]["status"] >= 400:
+        raise Exception(f"Manager lookup failed, user was not created ({failed(results['manager'])})")
+    if results["user"]["status"] >= 500:
+        # A server error does not prove the user was not created, so check before giving up
+        upn = user_data["userPrincipalName"]
+        lookup_resp = session.get(f"{GRAPH_API}/users/{upn}?$select=id")
+        if lookup_resp.status_code == 200:
+            return orjson.loads(lookup_resp.content)["id"], results["manager"]["body"]["id"]
+        raise Exception(f"User creation failed and {upn} does not exist ({failed(results['user'])})")
+    if results["user"]["status"] >= 400:
+        raise Exception(f"User creation failed ({failed(results['user'])})")
+    return results["user"]["body"]["id"], results["manager"]["body"]["id"]
+
+def assign_manager_and_groups(session, user_id, manager_id):
     # Assign manager by Object ID
-    assign_url = f"{GRAPH_API}/users/{user_id}/manager/$ref"
-    body = {
-        "@odata.id": f"https://graph.microsoft.com/v1.0/users/{manager_id}"
-    }
-    assign_resp = requests.put(assign_url, headers=headers, json=body)
-    assign_resp.raise_for_status()
+    batch_requests = [{
+        "id": "manager",
+        "method": "PUT",
+        "url": f"/users/{user_id}/manager/$ref",
+        "body": {"@odata.id": f"https://graph.microsoft.com/v1.0/users/{manager_id}"},
+        "headers": {"Content-Type": "application/json"}
+    }]
 
-def add_user_to_groups(token, user_id):
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
     for group_id in GROUP_IDS:
-        url = f"{GRAPH_API}/groups/{group_id}/members/$ref"
-        body = {
-            "@odata.id": f"https://graph.microsoft.com/v1.0/users/{user_id}"
-        }
-        response = requests.post(url, headers=headers, json=body)
-        response.raise_for_status()
-
-
+        batch_requests.append({
+            "id": f"group-{group_id}",
+            "method": "POST",
+            "url": f"/groups/{group_id}/members/$ref",
+            "body": {"@odata.id": f"https://graph.microsoft.com/v1.0/users/{user_id}"},
+            "headers": {"Content-Type": "application/json"}
+        })
 
+    # The new user may not have replicated yet, so 404s naming it are retried
+    return graph_batch(session, batch_requests, not_found_id=user_id)
 
 
 def main():
@@ -90,7 +169,7 @@ def main():
     department = input("Enter department: ").strip()
     office_location = input("Enter office location: ").strip()
 
-    token = get_token()
+    session = make_session(get_token())
 
     user_data = {
         "accountEnabled": True,
@@ -107,23 +186,29 @@ def main():
     }
 
     print("\nCreating user...")
-    user_id = create_user(token, user_data)
+    user_id, manager_id = create_user(session, user_data, manager_email)
     print(" User ID:", user_id)
     print(" User created.")
-    
-    print("\nAssigning licenses...")
-    time.sleep(10)  # Simulate license assignment delay
 
-    print("Assigning manager...")
-    assign_manager(token, user_id, manager_email)
-    print(" Manager assigned.")
+    print("Assigning manager and adding user to groups...")
+    results = assign_manager_and_groups(session, user_id, manager_id)
 
-    print("Adding user to groups...")
+    if results["manager"]["status"] < 400:
+        print(" Manager assigned.")
+    else:
+        print(f" Manager NOT assigned ({failed(results['manager'])})")
 
-    add_user_to_groups(token, user_id)
-    print(" User added to groups.")
-
-    print("\n Done! The user has been fully onboarded.\n")
+    for group_id in GROUP_IDS:
+        result = results[f"group-{group_id}"]
+        if result["status"] < 400:
+            print(f" Added to group {group_id}.")
+        else:
+            print(f" NOT added to group {group_id} ({failed(result)})")
+
+    if any(result["status"] >= 400 for result in results.values()):
+        print(f"\n User {user_id} was created, but the steps above marked NOT must be finished manually.\n")
+    else:
+        print("\n Done! The user has been fully onboarded.\n")
 
 if __name__ == "__main__":
     main()